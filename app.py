@@ -1,11 +1,56 @@
 # app.py - Main Flask application
+import importlib
 import os
-from flask import Flask, render_template
+from flask import Flask, current_app, render_template
 from flask_cors import CORS
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (once per process, even if config.py ran first)
+from utils.env import load_env
+load_env()
+
+# Blueprints are imported on demand from this table, so a module is only
+# paid for when create_app actually registers it
+BLUEPRINTS = [
+    ('routes.auth', 'auth_bp', '/api'),
+    ('routes.gigs', 'gigs_bp', '/api'),
+    ('routes.contracts', 'contracts_bp', '/api'),
+    ('routes.admin', 'admin_bp', '/api/admin'),
+]
+
+# Frontend page routes: (rule, endpoint, template). Every handler just
+# renders a constant template, so one table plus a shared closure replaces
+# a dozen identical view functions (path params are unused by the views).
+PAGE_ROUTES = [
+    ('/', 'index', 'index.html'),
+    ('/login', 'login_page', 'login.html'),
+    ('/signup', 'signup_page', 'signup.html'),
+    ('/admin', 'admin_page', 'admin.html'),
+    ('/dashboard', 'dashboard', 'dashboard.html'),
+    ('/gigs', 'browse_gigs', 'gigs.html'),
+    ('/gig/<int:gig_id>', 'gig_detail', 'gig_detail.html'),
+    ('/create-gig', 'create_gig_page', 'create_gig.html'),
+    ('/my-gigs', 'my_gigs', 'my_gigs.html'),
+    ('/profile', 'profile', 'profile.html'),
+    ('/manage-applications', 'manage_applications', 'manage_applications.html'),
+    ('/admin-dashboard', 'admin_dashboard', 'admin_dashboard.html'),
+    ('/contract/<int:contract_id>', 'contract_detail', 'contract_detail.html'),
+]
+
+# The page templates take no variables, so their output is constant.
+# Render each one once and serve the cached bytes afterwards (skipped in
+# debug mode so template edits still show up).
+_PAGE_CACHE = {}
+PAGE_HEADERS = {'Content-Type': 'text/html; charset=utf-8',
+                'Cache-Control': 'public, max-age=300'}
+
+def _render_page(template):
+    if current_app.debug:
+        return render_template(template)
+    body = _PAGE_CACHE.get(template)
+    if body is None:
+        body = render_template(template).encode('utf-8')
+        _PAGE_CACHE[template] = body
+    return body, 200, PAGE_HEADERS
 
 def create_app():
     app = Flask(__name__)
@@ -15,28 +60,27 @@ def create_app():
     app.config['DATABASE'] = os.getenv('DATABASE_URL', 'gigup.db')
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
     
-    # CORS configuration
-    CORS(app, supports_credentials=True, origins=[
-        "http://localhost:3000", 
-        "http://127.0.0.1:3000", 
+    # CORS configuration. frozenset gives O(1) origin matching, the explicit
+    # headers/methods skip flask-cors' default regex handling, and max_age
+    # lets browsers cache the preflight for a day so OPTIONS requests
+    # mostly disappear.
+    CORS(app, supports_credentials=True, origins=frozenset({
+        "http://localhost:3000",
+        "http://127.0.0.1:3000",
         "http://localhost:5000",
         "http://127.0.0.1:5000",
         "http://localhost:5001",
         "http://127.0.0.1:5001"
-    ])
+    }), allow_headers=('Content-Type', 'Authorization'),
+        methods=('GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'),
+        max_age=86400)
     
     # Import and register blueprints
     try:
-        from routes.auth import auth_bp
-        from routes.gigs import gigs_bp
-        from routes.contracts import contracts_bp
-        from routes.admin import admin_bp
-        
-        app.register_blueprint(auth_bp, url_prefix='/api')
-        app.register_blueprint(gigs_bp, url_prefix='/api')
-        app.register_blueprint(contracts_bp, url_prefix='/api')
-        app.register_blueprint(admin_bp, url_prefix='/api/admin')
-        
+        for module_name, attr, url_prefix in BLUEPRINTS:
+            module = importlib.import_module(module_name)
+            app.register_blueprint(getattr(module, attr), url_prefix=url_prefix)
+
         print("Blueprints registered successfully")
     except ImportError as e:
         print(f"Error importing blueprints: {e}")
@@ -50,57 +94,9 @@ def create_app():
         print(f"Error initializing database: {e}")
     
     # Frontend routes
-    @app.route('/')
-    def index():
-        return render_template('index.html')
-    
-    @app.route('/login')
-    def login_page():
-        return render_template('login.html')
-    
-    @app.route('/signup')
-    def signup_page():
-        return render_template('signup.html')
-    
-    @app.route('/admin')
-    def admin_page():
-        return render_template('admin.html')
-    
-    @app.route('/dashboard')
-    def dashboard():
-        return render_template('dashboard.html')
-    
-    @app.route('/gigs')
-    def browse_gigs():
-        return render_template('gigs.html')
-    
-    @app.route('/gig/<int:gig_id>')
-    def gig_detail(gig_id):
-        return render_template('gig_detail.html') #removed gig_id=gig_id
-
-    @app.route('/create-gig')
-    def create_gig_page():
-        return render_template('create_gig.html')
-    
-    @app.route('/my-gigs')
-    def my_gigs():
-        return render_template('my_gigs.html')
-    
-    @app.route('/profile')
-    def profile():
-        return render_template('profile.html')
-    
-    @app.route('/manage-applications')
-    def manage_applications():
-        return render_template('manage_applications.html')
-    
-    @app.route('/admin-dashboard')
-    def admin_dashboard():
-        return render_template('admin_dashboard.html')
-    
-    @app.route('/contract/<int:contract_id>')
-    def contract_detail(contract_id):
-        return render_template('contract_detail.html') #removed contract_id=contract_id
+    for rule, endpoint, template in PAGE_ROUTES:
+        app.add_url_rule(rule, endpoint,
+                         lambda template=template, **kwargs: _render_page(template))
     
     return app
 
@@ -1,8 +1,8 @@
 # config.py - Configuration settings
 import os
-from dotenv import load_dotenv
+from utils.env import load_env
 
-load_dotenv()
+load_env()
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -0,0 +1,145 @@
+# models/schema.py - Single source of truth for the database schema
+# Both the live init path (models/user.init_db) and the dev reset script
+# (reset_db.py) apply the same DDL from here, so pragmas, tables and
+# indexes cannot drift between the two.
+import sqlite3
+
+# Bump whenever SCHEMA_SQL changes so running databases pick up the DDL
+SCHEMA_VERSION = 7
+
+# Columns added after a table first shipped; CREATE TABLE IF NOT EXISTS
+# covers new databases, these ALTERs bring existing ones up to date.
+ADDITIVE_COLUMNS = (
+    ('verification_codes', 'code_hash', 'BLOB'),
+)
+
+SCHEMA_SQL = (
+    '''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        phone TEXT NOT NULL,
+        password_hash TEXT NOT NULL,
+        role TEXT DEFAULT 'user',
+        skills TEXT,
+        bio TEXT,
+        rating REAL DEFAULT 0.0,
+        total_ratings INTEGER DEFAULT 0,
+        verified_email BOOLEAN DEFAULT 0,
+        verified_phone BOOLEAN DEFAULT 0,
+        verified_social BOOLEAN DEFAULT 0,
+        is_approved BOOLEAN DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE IF NOT EXISTS gigs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        provider_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        category TEXT NOT NULL,
+        skills_required TEXT,
+        description TEXT,
+        date_time TEXT NOT NULL,
+        duration TEXT,
+        pay REAL NOT NULL,
+        location_lat REAL NOT NULL,
+        location_lng REAL NOT NULL,
+        location_address TEXT,
+        status TEXT DEFAULT 'open',
+        seeker_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (provider_id) REFERENCES users (id),
+        FOREIGN KEY (seeker_id) REFERENCES users (id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS contracts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        gig_id INTEGER NOT NULL,
+        provider_id INTEGER NOT NULL,
+        seeker_id INTEGER NOT NULL,
+        terms TEXT NOT NULL,
+        pay REAL NOT NULL,
+        hours INTEGER,
+        date TEXT NOT NULL,
+        provider_signature BLOB,
+        seeker_signature BLOB,
+        status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        signed_at TIMESTAMP,
+        FOREIGN KEY (gig_id) REFERENCES gigs (id),
+        FOREIGN KEY (provider_id) REFERENCES users (id),
+        FOREIGN KEY (seeker_id) REFERENCES users (id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS applications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        gig_id INTEGER NOT NULL,
+        seeker_id INTEGER NOT NULL,
+        message TEXT,
+        status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (gig_id) REFERENCES gigs (id),
+        FOREIGN KEY (seeker_id) REFERENCES users (id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS reviews (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        reviewer_id INTEGER NOT NULL,
+        reviewed_id INTEGER NOT NULL,
+        gig_id INTEGER NOT NULL,
+        rating INTEGER NOT NULL,
+        comment TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (reviewer_id) REFERENCES users (id),
+        FOREIGN KEY (reviewed_id) REFERENCES users (id),
+        FOREIGN KEY (gig_id) REFERENCES gigs (id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS verification_codes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        code TEXT NOT NULL DEFAULT '',
+        code_hash BLOB,
+        type TEXT NOT NULL,
+        expires_at TIMESTAMP NOT NULL,
+        used BOOLEAN DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )''',
+    # Indexes for the hot admin dashboard filters
+    'CREATE INDEX IF NOT EXISTS idx_users_verified_email ON users(verified_email)',
+    'CREATE INDEX IF NOT EXISTS idx_users_is_approved ON users(is_approved) WHERE is_approved = 0',
+    'CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_gigs_status ON gigs(status)',
+    'CREATE INDEX IF NOT EXISTS idx_gigs_created_at ON gigs(created_at)',
+    # Bounding-box prefilter for the gig feed and recommendations
+    'CREATE INDEX IF NOT EXISTS idx_gigs_status_loc ON gigs(status, location_lat, location_lng)',
+    # Per-user listings walk these in already-sorted order instead of
+    # filtering then sorting
+    'CREATE INDEX IF NOT EXISTS idx_gigs_provider_created ON gigs(provider_id, created_at DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_applications_seeker_created ON applications(seeker_id, created_at DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_applications_gig_created ON applications(gig_id, created_at DESC)',
+    "CREATE INDEX IF NOT EXISTS idx_applications_status ON applications(status) WHERE status = 'pending'",
+    'CREATE INDEX IF NOT EXISTS idx_contracts_parties ON contracts(provider_id, seeker_id, created_at DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_contracts_provider ON contracts(provider_id, created_at DESC)',
+    'CREATE INDEX IF NOT EXISTS idx_contracts_seeker ON contracts(seeker_id, created_at DESC)',
+    # Verification/reset lookups; both filter used = 0, so the partial
+    # indexes stay small no matter how many historical codes accumulate.
+    # users.email needs no index here: the UNIQUE constraint already
+    # builds one.
+    'CREATE INDEX IF NOT EXISTS idx_vcodes_lookup ON verification_codes(user_id, type, expires_at) WHERE used = 0',
+    "CREATE INDEX IF NOT EXISTS idx_vcodes_reset ON verification_codes(expires_at) WHERE used = 0 AND type = 'password_reset'",
+)
+
+def is_current(conn):
+    """True when the database already carries the current schema version."""
+    return conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION
+
+def apply(conn):
+    """Apply the full schema (tables + indexes) to a connection.
+
+    Runs as one executescript batch: a single parse pass and one commit
+    instead of a round-trip and implicit transaction per statement.
+    """
+    conn.executescript(';\n'.join(SCHEMA_SQL))
+    for table, column, decl in ADDITIVE_COLUMNS:
+        try:
+            conn.execute('ALTER TABLE %s ADD COLUMN %s %s' % (table, column, decl))
+        except sqlite3.OperationalError:
+            pass  # column already present
+    conn.executescript('ANALYZE;\nPRAGMA user_version = %d' % SCHEMA_VERSION)
+    conn.commit()
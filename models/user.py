@@ -1,122 +1,137 @@
 # models/user.py - Database models and initialization
+import atexit
+import queue
 import sqlite3
+import threading
 from flask import g
 from werkzeug.security import generate_password_hash
 
+from models import schema
+
+DATABASE = 'gigup.db'
+
+# Pools of reusable connections. LIFO so the most recently used connection
+# (with the warmest SQLite page cache) is handed out first. With WAL mode
+# readers never block behind the writer, so SELECT-only handlers draw from
+# a read-only pool while mutations funnel through a single writer.
+POOL_SIZE = 8
+READ_POOL_SIZE = 6
+_POOL = queue.LifoQueue(maxsize=POOL_SIZE)
+_READ_POOL = queue.LifoQueue(maxsize=READ_POOL_SIZE)
+_WRITE_LOCK = threading.Lock()
+_write_conn = None
+
+def _connect(read_only=False):
+    # cached_statements above the default 100 so the hot queries across all
+    # routes keep hitting sqlite3's prepared-statement cache
+    db = sqlite3.connect(DATABASE, check_same_thread=False,
+                         cached_statements=512)
+    db.row_factory = sqlite3.Row
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.execute('PRAGMA wal_autocheckpoint=1000')
+    db.execute('PRAGMA busy_timeout=5000')
+    db.execute('PRAGMA temp_store=MEMORY')
+    db.execute('PRAGMA cache_size=-20000')
+    db.execute('PRAGMA mmap_size=268435456')
+    if read_only:
+        db.execute('PRAGMA query_only=1')
+    return db
+
+def _close_pool():
+    global _write_conn
+    for pool in (_POOL, _READ_POOL):
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+    if _write_conn is not None:
+        _write_conn.close()
+        _write_conn = None
+
+atexit.register(_close_pool)
+
+def warm_pool(size=POOL_SIZE // 2):
+    """Pre-open pooled connections so early requests skip connect cost."""
+    while _POOL.qsize() < size:
+        try:
+            _POOL.put_nowait(_connect())
+        except queue.Full:
+            break
+
 def get_db():
     if 'db' not in g:
-        g.db = sqlite3.connect('gigup.db')
-        g.db.row_factory = sqlite3.Row
+        try:
+            g.db = _POOL.get_nowait()
+        except queue.Empty:
+            g.db = _connect()
     return g.db
 
+def get_read_db():
+    """Checkout a pooled read-only connection for SELECT-only handlers."""
+    if 'db_read' not in g:
+        try:
+            g.db_read = _READ_POOL.get_nowait()
+        except queue.Empty:
+            g.db_read = _connect(read_only=True)
+    return g.db_read
+
+def get_write_db():
+    """Checkout the single writer connection (held until request teardown)."""
+    global _write_conn
+    if 'db_write' not in g:
+        _WRITE_LOCK.acquire()
+        try:
+            if _write_conn is None:
+                _write_conn = _connect()
+        except BaseException:
+            _WRITE_LOCK.release()
+            raise
+        g.db_write = _write_conn
+    return g.db_write
+
 def close_db(e=None):
+    # Roll back anything a handler left uncommitted before the connection
+    # is reused: an error path that returns 500 without rollback() must
+    # not leak a live transaction into the next request, where an
+    # unrelated commit would persist the partial write.
     db = g.pop('db', None)
     if db is not None:
-        db.close()
+        if db.in_transaction:
+            db.rollback()
+        try:
+            _POOL.put_nowait(db)
+        except queue.Full:
+            db.close()
+    db_read = g.pop('db_read', None)
+    if db_read is not None:
+        if db_read.in_transaction:
+            db_read.rollback()
+        try:
+            _READ_POOL.put_nowait(db_read)
+        except queue.Full:
+            db_read.close()
+    db_write = g.pop('db_write', None)
+    if db_write is not None:
+        if db_write.in_transaction:
+            db_write.rollback()
+        _WRITE_LOCK.release()
 
 def init_db(app):
     app.teardown_appcontext(close_db)
-    
+    warm_pool()
+
     with app.app_context():
         db = get_db()
-        
-        # Users table
-        db.execute('''CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            phone TEXT NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT DEFAULT 'user',
-            skills TEXT,
-            bio TEXT,
-            rating REAL DEFAULT 0.0,
-            total_ratings INTEGER DEFAULT 0,
-            verified_email BOOLEAN DEFAULT 0,
-            verified_phone BOOLEAN DEFAULT 0,
-            verified_social BOOLEAN DEFAULT 0,
-            is_approved BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )''')
-        
-        # Gigs table
-        db.execute('''CREATE TABLE IF NOT EXISTS gigs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            provider_id INTEGER NOT NULL,
-            title TEXT NOT NULL,
-            category TEXT NOT NULL,
-            skills_required TEXT,
-            description TEXT,
-            date_time TEXT NOT NULL,
-            duration TEXT,
-            pay REAL NOT NULL,
-            location_lat REAL NOT NULL,
-            location_lng REAL NOT NULL,
-            location_address TEXT,
-            status TEXT DEFAULT 'open',
-            seeker_id INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (provider_id) REFERENCES users (id),
-            FOREIGN KEY (seeker_id) REFERENCES users (id)
-        )''')
-        
-        # Contracts table
-        db.execute('''CREATE TABLE IF NOT EXISTS contracts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            gig_id INTEGER NOT NULL,
-            provider_id INTEGER NOT NULL,
-            seeker_id INTEGER NOT NULL,
-            terms TEXT NOT NULL,
-            pay REAL NOT NULL,
-            hours INTEGER,
-            date TEXT NOT NULL,
-            provider_signature TEXT,
-            seeker_signature TEXT,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            signed_at TIMESTAMP,
-            FOREIGN KEY (gig_id) REFERENCES gigs (id),
-            FOREIGN KEY (provider_id) REFERENCES users (id),
-            FOREIGN KEY (seeker_id) REFERENCES users (id)
-        )''')
-        
-        # Applications table
-        db.execute('''CREATE TABLE IF NOT EXISTS applications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            gig_id INTEGER NOT NULL,
-            seeker_id INTEGER NOT NULL,
-            message TEXT,
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (gig_id) REFERENCES gigs (id),
-            FOREIGN KEY (seeker_id) REFERENCES users (id)
-        )''')
-        
-        # Reviews table
-        db.execute('''CREATE TABLE IF NOT EXISTS reviews (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            reviewer_id INTEGER NOT NULL,
-            reviewed_id INTEGER NOT NULL,
-            gig_id INTEGER NOT NULL,
-            rating INTEGER NOT NULL,
-            comment TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (reviewer_id) REFERENCES users (id),
-            FOREIGN KEY (reviewed_id) REFERENCES users (id),
-            FOREIGN KEY (gig_id) REFERENCES gigs (id)
-        )''')
-        
-        # Verification codes table
-        db.execute('''CREATE TABLE IF NOT EXISTS verification_codes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            code TEXT NOT NULL,
-            type TEXT NOT NULL,
-            expires_at TIMESTAMP NOT NULL,
-            used BOOLEAN DEFAULT 0,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )''')
-        
+
+        # Skip the DDL and admin-seed work entirely when the schema is
+        # already current (every worker boot runs through here)
+        if schema.is_current(db):
+            return
+
+        schema.apply(db)
+
         # Create admin user if not exists
         admin = db.execute('SELECT id FROM users WHERE email = ?', ('admin@gigup.com',)).fetchone()
         if not admin:
@@ -125,5 +140,5 @@ def init_db(app):
                           VALUES (?, ?, ?, ?, ?, ?, ?)''',
                        ('Admin', 'admin@gigup.com', '0000000000', admin_hash, 'admin', 1, 1))
             print("Admin user created: admin@gigup.com / admin123")
-        
-        db.commit()
\ No newline at end of file
+
+        db.commit()
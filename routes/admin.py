@@ -1,69 +1,88 @@
 # routes/admin.py - Enhanced Admin routes
-from flask import Blueprint, request, jsonify
-from models.user import get_db
-from routes.auth import admin_required
+import time
+from flask import Blueprint, request, Response, stream_with_context
+from models.user import get_read_db, get_write_db
+from routes.auth import admin_required, bump_claim_version
+from utils.serialization import dumps, json_response
 
 admin_bp = Blueprint('admin', __name__)
 
+USERS_SQL = '''SELECT id, name, email, phone, role, verified_email,
+               verified_phone, verified_social, is_approved, created_at
+               FROM users ORDER BY created_at DESC'''
+
+# Single round-trip for the dashboard stats; kept as one constant string so
+# sqlite3's statement cache can reuse the prepared statement across polls.
+STATS_SQL = '''SELECT
+    (SELECT COUNT(*) FROM users) AS total_users,
+    (SELECT COUNT(*) FROM users WHERE verified_email = 1) AS verified_users,
+    (SELECT COUNT(*) FROM gigs) AS total_gigs,
+    (SELECT COUNT(*) FROM gigs WHERE status = 'open') AS active_gigs,
+    (SELECT COUNT(*) FROM gigs WHERE status = 'completed') AS completed_gigs,
+    (SELECT COUNT(*) FROM contracts) AS total_contracts,
+    (SELECT COUNT(*) FROM applications WHERE status = 'pending') AS pending_applications,
+    (SELECT COUNT(*) FROM users WHERE is_approved = 0) AS pending_approvals,
+    (SELECT COUNT(*) FROM users WHERE created_at > datetime('now', '-7 days')) AS recent_users,
+    (SELECT COUNT(*) FROM gigs WHERE created_at > datetime('now', '-7 days')) AS recent_gigs'''
+
+STATS_TTL_SECONDS = 5
+_STATS_CACHE = {'ts': 0.0, 'stats': None}
+
 @admin_bp.route('/users', methods=['GET'])
 @admin_required
 def admin_get_users():
-    db = get_db()
-    users = db.execute('''SELECT id, name, email, phone, role, verified_email,
-                            verified_phone, verified_social, is_approved, created_at
-                            FROM users ORDER BY created_at DESC''').fetchall()
-    
-    return jsonify({'users': [dict(u) for u in users]}), 200
+    db = get_read_db()
+
+    # Stream rows as they come off the cursor instead of materializing
+    # the whole user list (and a second copy inside jsonify) in memory
+    def generate():
+        yield b'{"users":['
+        first = True
+        for row in db.execute(USERS_SQL):
+            if not first:
+                yield b','
+            first = False
+            yield dumps(dict(row))
+        yield b']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 @admin_bp.route('/users/<int:user_id>/approve', methods=['PUT'])
 @admin_required
 def admin_approve_user(user_id):
     data = request.json
     approved = data.get('approved', True)
-    
-    db = get_db()
+
+    db = get_write_db()
     try:
         db.execute('UPDATE users SET is_approved = ? WHERE id = ?', (approved, user_id))
         db.commit()
-        
+
+        # Live sessions cache the approval claim in the cookie; bump the
+        # user's claim version so they re-read it on their next request
+        bump_claim_version(user_id)
+
         status = 'approved' if approved else 'revoked'
-        return jsonify({'message': f'User {status} successfully'}), 200
+        return json_response({'message': f'User {status} successfully'}, 200)
     except Exception as e:
-        return jsonify({'error': 'Failed to update user approval'}), 500
+        return json_response({'error': 'Failed to update user approval'}, 500)
 
 @admin_bp.route('/stats', methods=['GET'])
 @admin_required
 def admin_stats():
-    db = get_db()
-    
+    # The dashboard polls this endpoint aggressively but the counts only
+    # change on the order of seconds; serve a short-lived cached copy
+    now = time.monotonic()
+    if _STATS_CACHE['stats'] is not None and now - _STATS_CACHE['ts'] < STATS_TTL_SECONDS:
+        return json_response(_STATS_CACHE['stats'], 200)
+
+    db = get_read_db()
+
     try:
-        # Enhanced stats
-        total_users = db.execute('SELECT COUNT(*) as count FROM users').fetchone()['count']
-        verified_users = db.execute('SELECT COUNT(*) as count FROM users WHERE verified_email = 1').fetchone()['count']
-        total_gigs = db.execute('SELECT COUNT(*) as count FROM gigs').fetchone()['count']
-        active_gigs = db.execute('SELECT COUNT(*) as count FROM gigs WHERE status = "open"').fetchone()['count']
-        completed_gigs = db.execute('SELECT COUNT(*) as count FROM gigs WHERE status = "completed"').fetchone()['count']
-        total_contracts = db.execute('SELECT COUNT(*) as count FROM contracts').fetchone()['count']
-        pending_applications = db.execute('SELECT COUNT(*) as count FROM applications WHERE status = "pending"').fetchone()['count']
-        pending_approvals = db.execute('SELECT COUNT(*) as count FROM users WHERE is_approved = 0').fetchone()['count']
-        
-        # Recent activity
-        recent_users = db.execute('SELECT COUNT(*) as count FROM users WHERE created_at > datetime("now", "-7 days")').fetchone()['count']
-        recent_gigs = db.execute('SELECT COUNT(*) as count FROM gigs WHERE created_at > datetime("now", "-7 days")').fetchone()['count']
-        
-        stats = {
-            'total_users': total_users,
-            'verified_users': verified_users,
-            'total_gigs': total_gigs,
-            'active_gigs': active_gigs,
-            'completed_gigs': completed_gigs,
-            'total_contracts': total_contracts,
-            'pending_applications': pending_applications,
-            'pending_approvals': pending_approvals,
-            'recent_users': recent_users,
-            'recent_gigs': recent_gigs
-        }
-        
-        return jsonify(stats), 200
+        # All counts in one statement instead of 10 separate round-trips
+        stats = dict(db.execute(STATS_SQL).fetchone())
+        _STATS_CACHE['stats'] = stats
+        _STATS_CACHE['ts'] = now
+        return json_response(stats, 200)
     except Exception as e:
-        return jsonify({'error': 'Failed to fetch stats'}), 500
\ No newline at end of file
+        return json_response({'error': 'Failed to fetch stats'}, 500)
\ No newline at end of file
@@ -1,32 +1,84 @@
 # routes/auth.py - Authentication routes
-from flask import Blueprint, request, jsonify, session
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, g, request, jsonify, session
 from models.user import get_db
-from utils.validation import validate_email, validate_phone, validate_password
+from utils.validation import (validate_email, validate_phone, validate_password,
+                              hash_password, verify_password, missing_fields)
+from utils.serialization import json_response
+import hashlib
+import hmac
+import os
 import secrets
 from datetime import datetime, timedelta
 from functools import wraps
 
 auth_bp = Blueprint('auth', __name__)
 
-# Authentication decorators
-def auth_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            return jsonify({'error': 'Authentication required'}), 401
-        
+# Required request fields per endpoint, built once at import
+_SIGNUP_REQUIRED = ('name', 'email', 'phone', 'password')
+_CHANGE_PASSWORD_REQUIRED = ('current_password', 'new_password')
+
+# Hash of a throwaway password, verified against on login when the email
+# doesn't exist so unknown and known emails take the same time (otherwise
+# the fast 401 on the miss path is a user-enumeration timing oracle)
+_FAKE_HASH = hash_password(secrets.token_urlsafe(16))
+
+# Authentication decorators. Approval status and role are stored in the
+# signed session cookie at login, so the common case costs zero DB queries;
+# sessions minted before the claim existed fall back to a one-time lookup.
+
+# Per-user claim version, bumped whenever an admin changes a user's
+# approval: sessions carrying an older version re-read their claims from
+# the database on the next request instead of coasting on the cookie.
+# An in-process dict is enough for this single-process app; a
+# multi-worker deployment would need this in the database or a shared
+# cache.
+_CLAIM_VERSIONS = {}
+
+def bump_claim_version(user_id):
+    """Invalidate the cached session claims of every live session for user_id."""
+    _CLAIM_VERSIONS[user_id] = _CLAIM_VERSIONS.get(user_id, 0) + 1
+
+def _ensure_approval_claim():
+    """Backfill or refresh session['is_approved'].
+
+    Covers sessions minted before the claim existed and sessions whose
+    claim version fell behind (approval granted or revoked since login).
+    """
+    version = _CLAIM_VERSIONS.get(session['user_id'], 0)
+    if session.get('claims_version') != version:
+        session.pop('is_approved', None)
+        session['claims_version'] = version
+    if 'is_approved' not in session:
         db = get_db()
-        user = db.execute('SELECT id, is_approved FROM users WHERE id = ?', 
+        user = db.execute('SELECT is_approved FROM users WHERE id = ?',
                         (session['user_id'],)).fetchone()
-        
         if not user:
-            session.pop('user_id', None)
-            return jsonify({'error': 'User account not found'}), 404
-            
-        if not user['is_approved']:
-            return jsonify({'error': 'Account pending approval'}), 403
-            
+            return False
+        session['is_approved'] = bool(user['is_approved'])
+    return True
+
+def check_auth():
+    """Session-claim auth check shared by the decorator and the
+    blueprint-level before_request hooks; returns an error response or
+    None when the caller is authenticated and approved."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    if not _ensure_approval_claim():
+        session.pop('user_id', None)
+        return jsonify({'error': 'User account not found'}), 404
+
+    if not session['is_approved']:
+        return jsonify({'error': 'Account pending approval'}), 403
+
+    return None
+
+def auth_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        error = check_auth()
+        if error is not None:
+            return error
         return f(*args, **kwargs)
     return decorated_function
 
@@ -35,44 +87,112 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             return jsonify({'error': 'Authentication required'}), 401
-        
-        db = get_db()
-        user = db.execute('SELECT role FROM users WHERE id = ?', 
-                        (session['user_id'],)).fetchone()
-        
-        if not user or user['role'] != 'admin':
+
+        if session.get('user_role') != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
-            
+
         return f(*args, **kwargs)
     return decorated_function
 
+# Endpoints on this blueprint reachable without a session; everything else
+# goes through the before_request hook below, which replaces a wraps()
+# wrapper per view with one set lookup per request
+_PUBLIC_ENDPOINTS = frozenset({'signup', 'login', 'logout', 'check_session',
+                               'request_password_reset', 'reset_password'})
+
+@auth_bp.before_request
+def _require_auth():
+    if (request.endpoint or '').rsplit('.', 1)[-1] in _PUBLIC_ENDPOINTS:
+        return None
+    return check_auth()
+
+def current_user():
+    """The logged-in user's row, fetched at most once per request.
+
+    Memoized on flask.g only — no cross-request cache, so profile edits
+    are visible immediately on the next request.
+    """
+    if 'current_user' not in g:
+        db = get_db()
+        g.current_user = db.execute('SELECT * FROM users WHERE id = ?',
+                                    (session['user_id'],)).fetchone()
+    return g.current_user
+
 # Helper functions
+def _hash_code(code):
+    """Digest a verification code for storage and indexed lookup."""
+    return hashlib.blake2b(code.encode(), digest_size=16).digest()
+
+# Pepper for reset-token digests; kept in the environment so a database
+# dump alone cannot be replayed into valid tokens
+_TOKEN_PEPPER = os.getenv('TOKEN_PEPPER', 'dev-token-pepper-change-in-production').encode()
+
+def _hash_token(token):
+    """Keyed digest of a reset token for storage.
+
+    HMAC-SHA256 rather than a KDF: the token is 256 bits of entropy from
+    secrets, not a human-chosen secret, so one fast hash is enough and
+    costs nothing on the request path.
+    """
+    return hmac.new(_TOKEN_PEPPER, token.encode(), 'sha256').digest()
+
 def generate_verification_code(user_id, verification_type):
     """Generate and store verification code"""
     db = get_db()
-    code = secrets.token_urlsafe(8)
+    # 6-digit numeric code a user can actually type from an email/SMS;
+    # only its digest is persisted, so a DB read leaks no usable codes
+    code = f"{secrets.randbelow(1_000_000):06d}"
     expires_at = datetime.now() + timedelta(hours=24)
-    
-    # Invalidate any existing codes for this type
-    db.execute('UPDATE verification_codes SET used = 1 WHERE user_id = ? AND type = ? AND used = 0',
-               (user_id, verification_type))
-    
-    # Insert new code
-    db.execute('''INSERT INTO verification_codes (user_id, code, type, expires_at)
-                  VALUES (?, ?, ?, ?)''',
-               (user_id, code, verification_type, expires_at))
-    db.commit()
-    
+
+    # Invalidate the old codes and insert the new one in one IMMEDIATE
+    # transaction: the write lock is taken up front (no deferred-upgrade
+    # deadlock under concurrent writers) and both statements share a
+    # single commit/fsync. Callers like signup may already hold an open
+    # transaction, in which case we just join it.
+    if not db.in_transaction:
+        db.execute('BEGIN IMMEDIATE')
+    try:
+        db.execute('UPDATE verification_codes SET used = 1 WHERE user_id = ? AND type = ? AND used = 0',
+                   (user_id, verification_type))
+        # code is bound as '' explicitly: databases created before hashed
+        # storage have the column as NOT NULL without a default, and
+        # ALTER TABLE cannot retrofit one
+        db.execute('''INSERT INTO verification_codes (user_id, code, code_hash, type, expires_at)
+                      VALUES (?, '', ?, ?, ?)''',
+                   (user_id, _hash_code(code), verification_type, expires_at))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
     return code
 
+def find_verification_code(user_id, verification_type, code):
+    """Find the active verification code row matching a submitted code.
+
+    The submitted code is deliberately kept out of the SQL WHERE clause:
+    candidates are fetched by (user, type) and compared in Python with
+    hmac.compare_digest, so string comparison cannot leak timing
+    information about code prefixes.
+    """
+    db = get_db()
+    submitted_hash = _hash_code(code)
+    candidates = db.execute('''SELECT id, code, code_hash FROM verification_codes
+                             WHERE user_id = ? AND type = ?
+                             AND used = 0 AND expires_at > ?''',
+                            (user_id, verification_type, datetime.now())).fetchall()
+    for row in candidates:
+        if row['code_hash'] is not None:
+            if hmac.compare_digest(row['code_hash'], submitted_hash):
+                return row
+        elif hmac.compare_digest(row['code'], code):
+            # row predates hashed storage
+            return row
+    return None
+
 def validate_verification_code(user_id, verification_type, code):
     """Validate verification code"""
-    db = get_db()
-    verification = db.execute('''SELECT * FROM verification_codes 
-                               WHERE user_id = ? AND type = ? AND code = ? 
-                               AND used = 0 AND expires_at > ?''',
-                             (user_id, verification_type, code, datetime.now())).fetchone()
-    return verification is not None
+    return find_verification_code(user_id, verification_type, code) is not None
 
 def mark_verification_code_used(verification_id):
     """Mark verification code as used"""
@@ -87,8 +207,7 @@ def signup():
     data = request.json
     
     # Validate required fields
-    required = ['name', 'email', 'phone', 'password']
-    if not all(k in data for k in required):
+    if missing_fields(data, _SIGNUP_REQUIRED):
         return jsonify({'error': 'Missing required fields'}), 400
     
     # Enhanced validation
@@ -102,7 +221,7 @@ def signup():
         return jsonify({'error': 'Password must be at least 6 characters'}), 400
     
     # Hash password
-    password_hash = generate_password_hash(data['password'])
+    password_hash = hash_password(data['password'])
     db = get_db()
     
     try:
@@ -138,17 +257,25 @@ def login():
         return jsonify({'error': 'Email and password required'}), 400
     
     db = get_db()
-    user = db.execute('SELECT * FROM users WHERE email = ?', (data['email'],)).fetchone()
-    
-    if not user or not check_password_hash(user['password_hash'], data['password']):
+    user = db.execute('''SELECT id, name, email, role, password_hash, skills, bio,
+                       rating, total_ratings, verified_email, verified_phone,
+                       verified_social, is_approved
+                       FROM users WHERE email = ?''', (data['email'],)).fetchone()
+
+    # Always run the KDF, against a fake hash when the email is unknown
+    ok = verify_password(user['password_hash'] if user else _FAKE_HASH,
+                         data['password'])
+    if not user or not ok:
         return jsonify({'error': 'Invalid credentials'}), 401
     
     if not user['is_approved']:
         return jsonify({'error': 'Account pending admin approval'}), 403
     
-    # Create session
+    # Create session (approval/role claims let the decorators skip the DB)
     session['user_id'] = user['id']
     session['user_role'] = user['role']
+    session['is_approved'] = bool(user['is_approved'])
+    session['claims_version'] = _CLAIM_VERSIONS.get(user['id'], 0)
     
     return jsonify({
         'message': 'Login successful',
@@ -176,7 +303,6 @@ def logout():
     return jsonify({'message': 'Logged out successfully'}), 200
 
 @auth_bp.route('/me', methods=['GET'])
-@auth_required
 def get_current_user():
     """Get current user profile"""
     db = get_db()
@@ -189,47 +315,54 @@ def get_current_user():
         session.clear()
         return jsonify({'error': 'User not found'}), 404
     
-    return jsonify({'user': dict(user)}), 200
+    return json_response({'user': dict(user)})
 
 # Profile management endpoints
+# One static statement for every field combination: COALESCE keeps the
+# current value where the client sent nothing, so sqlite3's prepared-
+# statement cache always hits instead of re-preparing per-request SQL
+# built from the submitted field names
+SQL_UPDATE_PROFILE = '''UPDATE users SET name = COALESCE(?, name),
+                        phone = COALESCE(?, phone),
+                        skills = COALESCE(?, skills),
+                        bio = COALESCE(?, bio)
+                        WHERE id = ?'''
+
 @auth_bp.route('/profile', methods=['PUT'])
-@auth_required
 def update_profile():
     """Update user profile"""
     data = request.json
     user_id = session['user_id']
-    
-    allowed_fields = ['name', 'phone', 'skills', 'bio']
+
+    allowed_fields = ('name', 'phone', 'skills', 'bio')
     update_fields = {k: v for k, v in data.items() if k in allowed_fields}
-    
+
     if not update_fields:
         return jsonify({'error': 'No valid fields to update'}), 400
-    
+
     # Validate phone if being updated
     if 'phone' in update_fields and not validate_phone(update_fields['phone']):
         return jsonify({'error': 'Invalid phone number'}), 400
-    
+
     db = get_db()
     try:
-        set_clause = ', '.join([f'{k} = ?' for k in update_fields.keys()])
-        values = list(update_fields.values()) + [user_id]
-        
-        db.execute(f'UPDATE users SET {set_clause} WHERE id = ?', values)
+        db.execute(SQL_UPDATE_PROFILE,
+                   (update_fields.get('name'), update_fields.get('phone'),
+                    update_fields.get('skills'), update_fields.get('bio'),
+                    user_id))
         db.commit()
-        
+
         return jsonify({'message': 'Profile updated successfully'}), 200
     except Exception as e:
         return jsonify({'error': 'Profile update failed'}), 500
 
 @auth_bp.route('/profile/password', methods=['PUT'])
-@auth_required
 def change_password():
     """Change user password"""
     data = request.json
     user_id = session['user_id']
     
-    required = ['current_password', 'new_password']
-    if not all(k in data for k in required):
+    if missing_fields(data, _CHANGE_PASSWORD_REQUIRED):
         return jsonify({'error': 'Current password and new password required'}), 400
     
     if not validate_password(data['new_password']):
@@ -238,11 +371,11 @@ def change_password():
     db = get_db()
     user = db.execute('SELECT password_hash FROM users WHERE id = ?', (user_id,)).fetchone()
     
-    if not user or not check_password_hash(user['password_hash'], data['current_password']):
+    if not user or not verify_password(user['password_hash'], data['current_password']):
         return jsonify({'error': 'Current password is incorrect'}), 401
     
     try:
-        new_password_hash = generate_password_hash(data['new_password'])
+        new_password_hash = hash_password(data['new_password'])
         db.execute('UPDATE users SET password_hash = ? WHERE id = ?', 
                    (new_password_hash, user_id))
         db.commit()
@@ -253,7 +386,6 @@ def change_password():
 
 # Verification endpoints
 @auth_bp.route('/verify/email/send', methods=['POST'])
-@auth_required
 def send_email_verification():
     """Send email verification code"""
     user_id = session['user_id']
@@ -278,7 +410,6 @@ def send_email_verification():
         return jsonify({'error': 'Failed to send verification code'}), 500
 
 @auth_bp.route('/verify/phone/send', methods=['POST'])
-@auth_required
 def send_phone_verification():
     """Send phone verification code"""
     user_id = session['user_id']
@@ -303,13 +434,11 @@ def send_phone_verification():
         return jsonify({'error': 'Failed to send verification code'}), 500
 
 @auth_bp.route('/verify/email', methods=['POST'])
-@auth_required
 def verify_email():
     """Verify email with code"""
     return verify_account('email')
 
 @auth_bp.route('/verify/phone', methods=['POST'])
-@auth_required
 def verify_phone():
     """Verify phone with code"""
     return verify_account('phone')
@@ -329,12 +458,10 @@ def verify_account(verification_type):
     db = get_db()
     
     try:
-        # Check verification code
-        verification = db.execute('''SELECT * FROM verification_codes 
-                                   WHERE user_id = ? AND type = ? AND code = ? 
-                                   AND used = 0 AND expires_at > ?''',
-                                 (user_id, verification_type, code, datetime.now())).fetchone()
-        
+        # Check verification code (constant-time compare, see
+        # find_verification_code)
+        verification = find_verification_code(user_id, verification_type, code)
+
         if not verification:
             return jsonify({'error': 'Invalid or expired verification code'}), 400
         
@@ -364,15 +491,16 @@ def request_password_reset():
     user = db.execute('SELECT id FROM users WHERE email = ?', (email,)).fetchone()
     
     if user:
-        # Generate reset token (in production, this would be a secure token)
         reset_token = secrets.token_urlsafe(32)
         expires_at = datetime.now() + timedelta(hours=1)
-        
-        # Store reset token (in production, use a separate table for reset tokens)
-        # For MVP, we'll use the verification_codes table
-        db.execute('''INSERT INTO verification_codes (user_id, code, type, expires_at)
-                      VALUES (?, ?, 'password_reset', ?)''',
-                   (user['id'], reset_token, expires_at))
+
+        # Only the peppered digest is stored (in production, use a separate
+        # table for reset tokens); for MVP we use verification_codes.
+        # code is bound as '' for pre-hash databases where it is NOT NULL
+        # without a default.
+        db.execute('''INSERT INTO verification_codes (user_id, code, code_hash, type, expires_at)
+                      VALUES (?, '', ?, 'password_reset', ?)''',
+                   (user['id'], _hash_token(reset_token), expires_at))
         db.commit()
         
         # In production, send email with reset link
@@ -402,17 +530,30 @@ def reset_password():
     db = get_db()
     
     try:
-        # Verify reset token
-        verification = db.execute('''SELECT * FROM verification_codes 
-                                   WHERE code = ? AND type = 'password_reset' 
-                                   AND used = 0 AND expires_at > ?''',
-                                 (token, datetime.now())).fetchone()
-        
+        # Verify reset token; candidates are fetched without the token in
+        # the WHERE clause and compared constant-time, as in
+        # find_verification_code
+        submitted_hash = _hash_token(token)
+        candidates = db.execute('''SELECT * FROM verification_codes
+                                 WHERE type = 'password_reset'
+                                 AND used = 0 AND expires_at > ?''',
+                                (datetime.now(),)).fetchall()
+        verification = None
+        for row in candidates:
+            if row['code_hash'] is not None:
+                if hmac.compare_digest(row['code_hash'], submitted_hash):
+                    verification = row
+                    break
+            elif hmac.compare_digest(row['code'], token):
+                # row predates hashed storage
+                verification = row
+                break
+
         if not verification:
             return jsonify({'error': 'Invalid or expired reset token'}), 400
         
         # Update password
-        new_password_hash = generate_password_hash(new_password)
+        new_password_hash = hash_password(new_password)
         db.execute('UPDATE users SET password_hash = ? WHERE id = ?',
                    (new_password_hash, verification['user_id']))
         
@@ -431,13 +572,9 @@ def check_session():
     """Check if user has valid session"""
     if 'user_id' not in session:
         return jsonify({'authenticated': False}), 200
-    
-    db = get_db()
-    user = db.execute('SELECT id, is_approved FROM users WHERE id = ?', 
-                     (session['user_id'],)).fetchone()
-    
-    if not user or not user['is_approved']:
+
+    if not _ensure_approval_claim() or not session['is_approved']:
         session.clear()
         return jsonify({'authenticated': False}), 200
-    
+
     return jsonify({'authenticated': True}), 200
\ No newline at end of file
@@ -1,29 +1,80 @@
 # routes/contracts.py - Contracts routes
 from flask import Blueprint, request, jsonify, session
 from models.user import get_db
-from routes.auth import auth_required
+from utils.serialization import json_response, rows_to_dicts
+from utils.validation import missing_fields
+from routes.auth import check_auth
 import base64
 import os
 from datetime import datetime
 
 contracts_bp = Blueprint('contracts', __name__)
 
+# Every contract endpoint requires an authenticated, approved caller, so
+# one blueprint hook replaces a functools.wraps wrapper on each view
+@contracts_bp.before_request
+def _require_auth():
+    return check_auth()
+
+# Upper bound on the base64 signature payload (~150KB of PNG), so a bad
+# client can't push an arbitrarily large blob through the request
+MAX_SIGNATURE_B64_LEN = 200_000
+
+# Required request fields, built once at import
+_CONTRACT_REQUIRED = ('gig_id', 'seeker_id', 'terms', 'pay', 'date')
+
+# Hot statements kept as module-level constants so each execute passes the
+# identical string and sqlite3's prepared-statement cache always hits
+SQL_GET_CONTRACT = 'SELECT * FROM contracts WHERE id = ?'
+# One fused statement for signing: picks the signature column matching the
+# caller, refuses non-parties via the WHERE clause, and hands back both
+# signatures plus the gig id without a separate re-read
+SQL_SIGN_CONTRACT = '''UPDATE contracts SET
+                       provider_signature = CASE WHEN provider_id = ? THEN ? ELSE provider_signature END,
+                       seeker_signature = CASE WHEN seeker_id = ? THEN ? ELSE seeker_signature END
+                       WHERE id = ? AND (provider_id = ? OR seeker_id = ?)
+                       RETURNING provider_signature, seeker_signature, gig_id'''
+SQL_CREATE_CONTRACT = '''INSERT INTO contracts (gig_id, provider_id, seeker_id, terms,
+                         pay, hours, date)
+                         VALUES (?, ?, ?, ?, ?, ?, ?)'''
+# The listing projects every column except the signature blobs, which can
+# be tens of KB each and are only needed on the detail view. The provider/
+# seeker sides are split into a UNION ALL (binds: user_id x3) because an
+# OR across two columns defeats SQLite's index selection, while each half
+# here walks its own (party, created_at DESC) index.
+_USER_CONTRACTS_COLS = '''c.id, c.gig_id, c.provider_id, c.seeker_id, c.terms,
+                        c.pay, c.hours, c.date, c.status, c.created_at AS created_at,
+                        c.signed_at,
+                        g.title, u1.name as provider_name, u2.name as seeker_name
+                        FROM contracts c
+                        JOIN gigs g ON c.gig_id = g.id
+                        JOIN users u1 ON c.provider_id = u1.id
+                        JOIN users u2 ON c.seeker_id = u2.id'''
+SQL_USER_CONTRACTS = '''SELECT %s WHERE c.provider_id = ?
+                        UNION ALL
+                        SELECT %s WHERE c.seeker_id = ? AND c.provider_id != ?
+                        ORDER BY created_at DESC''' % (_USER_CONTRACTS_COLS,
+                                                       _USER_CONTRACTS_COLS)
+SQL_CONTRACT_DETAIL = '''SELECT c.*, g.title, u1.name as provider_name, u2.name as seeker_name,
+                         u1.email as provider_email, u2.email as seeker_email
+                         FROM contracts c
+                         JOIN gigs g ON c.gig_id = g.id
+                         JOIN users u1 ON c.provider_id = u1.id
+                         JOIN users u2 ON c.seeker_id = u2.id
+                         WHERE c.id = ?'''
+
 @contracts_bp.route('/contracts', methods=['POST'])
-@auth_required
 def create_contract():
     data = request.json
     provider_id = session['user_id']
     
-    required = ['gig_id', 'seeker_id', 'terms', 'pay', 'date']
-    if not all(k in data for k in required):
+    if missing_fields(data, _CONTRACT_REQUIRED):
         return jsonify({'error': 'Missing required fields'}), 400
     
     db = get_db()
     try:
         c = db.cursor()
-        c.execute('''INSERT INTO contracts (gig_id, provider_id, seeker_id, terms,
-                     pay, hours, date)
-                     VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        c.execute(SQL_CREATE_CONTRACT,
                   (data['gig_id'], provider_id, data['seeker_id'], data['terms'],
                    data['pay'], data.get('hours'), data['date']))
         contract_id = c.lastrowid
@@ -35,7 +86,6 @@ def create_contract():
         return jsonify({'error': 'Failed to create contract'}), 500
 
 @contracts_bp.route('/contracts/<int:contract_id>/sign', methods=['POST'])
-@auth_required
 def sign_contract(contract_id):
     data = request.json
     user_id = session['user_id']
@@ -43,35 +93,47 @@ def sign_contract(contract_id):
     
     if not signature:
         return jsonify({'error': 'Signature required'}), 400
-    
+
+    # The frontend sends canvas.toDataURL(), i.e. a data URL
+    # ("data:image/png;base64,<payload>"); strip the header and keep only
+    # the base64 payload. Bare base64 from API callers has no comma and
+    # passes through rpartition unchanged.
+    payload = signature.rpartition(',')[2]
+
+    if len(payload) > MAX_SIGNATURE_B64_LEN:
+        return jsonify({'error': 'Signature too large'}), 413
+
+    # Store raw bytes, not base64: 25% fewer bytes through SQLite on every
+    # subsequent read of the contract
+    try:
+        raw_signature = base64.b64decode(payload, validate=True)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid signature encoding'}), 400
+
     db = get_db()
     try:
-        contract = db.execute('SELECT * FROM contracts WHERE id = ?', 
-                               (contract_id,)).fetchone()
-        
-        if not contract:
-            return jsonify({'error': 'Contract not found'}), 404
-        
-        # Determine if provider or seeker is signing
-        if user_id == contract['provider_id']:
-            db.execute('UPDATE contracts SET provider_signature = ? WHERE id = ?',
-                        (signature, contract_id))
-        elif user_id == contract['seeker_id']:
-            db.execute('UPDATE contracts SET seeker_signature = ? WHERE id = ?',
-                        (signature, contract_id))
-        else:
+        # Write the caller's signature and read back both signatures in one
+        # statement; no row means the contract is missing or the caller is
+        # not a party to it
+        updated = db.execute(SQL_SIGN_CONTRACT,
+                             (user_id, raw_signature, user_id, raw_signature,
+                              contract_id, user_id, user_id)).fetchone()
+
+        if not updated:
+            exists = db.execute('SELECT 1 FROM contracts WHERE id = ?',
+                                (contract_id,)).fetchone()
+            if not exists:
+                return jsonify({'error': 'Contract not found'}), 404
             return jsonify({'error': 'Unauthorized'}), 403
-        
+
         # Check if both parties have signed
-        updated = db.execute('SELECT * FROM contracts WHERE id = ?', 
-                              (contract_id,)).fetchone()
         if updated['provider_signature'] and updated['seeker_signature']:
             db.execute('''UPDATE contracts SET status = 'signed', signed_at = CURRENT_TIMESTAMP
                            WHERE id = ?''', (contract_id,))
             # Update gig status
             db.execute('UPDATE gigs SET status = ? WHERE id = ?',
                         ('in_progress', updated['gig_id']))
-        
+
         db.commit()
         return jsonify({'message': 'Contract signed successfully'}), 200
     except Exception as e:
@@ -79,31 +141,16 @@ def sign_contract(contract_id):
         return jsonify({'error': 'Failed to sign contract'}), 500
 
 @contracts_bp.route('/user/contracts', methods=['GET'])
-@auth_required
 def get_user_contracts():
     user_id = session['user_id']
     db = get_db()
-    contracts = db.execute('''SELECT c.*, g.title, u1.name as provider_name, u2.name as seeker_name
-                               FROM contracts c
-                               JOIN gigs g ON c.gig_id = g.id
-                               JOIN users u1 ON c.provider_id = u1.id
-                               JOIN users u2 ON c.seeker_id = u2.id
-                               WHERE c.provider_id = ? OR c.seeker_id = ?
-                               ORDER BY c.created_at DESC''',
-                           (user_id, user_id)).fetchall()
-    return jsonify({'contracts': [dict(contract) for contract in contracts]}), 200
+    contracts = db.execute(SQL_USER_CONTRACTS, (user_id, user_id, user_id)).fetchall()
+    return json_response({'contracts': rows_to_dicts(contracts)})
 
 @contracts_bp.route('/contracts/<int:contract_id>', methods=['GET'])
-@auth_required
 def get_contract(contract_id):
     db = get_db()
-    contract = db.execute('''SELECT c.*, g.title, u1.name as provider_name, u2.name as seeker_name,
-                            u1.email as provider_email, u2.email as seeker_email
-                            FROM contracts c
-                            JOIN gigs g ON c.gig_id = g.id
-                            JOIN users u1 ON c.provider_id = u1.id
-                            JOIN users u2 ON c.seeker_id = u2.id
-                            WHERE c.id = ?''', (contract_id,)).fetchone()
+    contract = db.execute(SQL_CONTRACT_DETAIL, (contract_id,)).fetchone()
     
     if not contract:
         return jsonify({'error': 'Contract not found'}), 404
@@ -113,15 +160,23 @@ def get_contract(contract_id):
     if contract['provider_id'] != user_id and contract['seeker_id'] != user_id:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    return jsonify({'contract': dict(contract)}), 200
+    # Re-encode stored signature bytes as the data URL the template drops
+    # into <img src>; rows written before blob storage still hold the
+    # full data URL as text and pass through as-is
+    contract = dict(contract)
+    for col in ('provider_signature', 'seeker_signature'):
+        if isinstance(contract[col], bytes):
+            contract[col] = ('data:image/png;base64,'
+                             + base64.b64encode(contract[col]).decode('ascii'))
+
+    return json_response({'contract': contract})
 
 @contracts_bp.route('/contracts/<int:contract_id>/complete', methods=['PUT'])
-@auth_required
 def complete_contract(contract_id):
     db = get_db()
     
     try:
-        contract = db.execute('SELECT * FROM contracts WHERE id = ?', (contract_id,)).fetchone()
+        contract = db.execute(SQL_GET_CONTRACT, (contract_id,)).fetchone()
         if not contract:
             return jsonify({'error': 'Contract not found'}), 404
         
@@ -144,12 +199,11 @@ def complete_contract(contract_id):
         return jsonify({'error': 'Failed to complete contract'}), 500
 
 @contracts_bp.route('/contracts/<int:contract_id>/cancel', methods=['PUT'])
-@auth_required
 def cancel_contract(contract_id):
     db = get_db()
     
     try:
-        contract = db.execute('SELECT * FROM contracts WHERE id = ?', (contract_id,)).fetchone()
+        contract = db.execute(SQL_GET_CONTRACT, (contract_id,)).fetchone()
         if not contract:
             return jsonify({'error': 'Contract not found'}), 404
         
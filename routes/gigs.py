@@ -1,16 +1,47 @@
 # routes/gigs.py - Gigs routes
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, session
 from models.user import get_db
-from utils.location import haversine_distance, calculate_match_score
-from utils.validation import validate_coordinates
+from utils.location import (haversine_vector, make_haversine_from,
+                            calculate_match_score, parse_skills)
+from utils.validation import validate_coordinates, missing_fields
+from utils.serialization import json_response, rows_to_dicts
+import heapq
+import logging
 import secrets
 from datetime import datetime, timedelta
 from functools import wraps
+from itertools import count
+from math import cos, radians
+from operator import itemgetter
+
+logger = logging.getLogger(__name__)
 
 gigs_bp = Blueprint('gigs', __name__)
 
+# Required request fields, built once at import
+_GIG_REQUIRED = ('title', 'category', 'date_time', 'pay', 'location_lat', 'location_lng')
+
+# Constant SQL so sqlite3's prepared-statement cache hits on every insert
+SQL_CREATE_GIG = '''INSERT INTO gigs (provider_id, title, category, skills_required,
+                    description, date_time, duration, pay, location_lat, location_lng,
+                    location_address)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
 # Import auth decorators
-from routes.auth import auth_required, admin_required
+from routes.auth import auth_required, admin_required, current_user
+
+def _bounding_box(lat, lng, max_distance):
+    """Lat/lng bounds of a box max_distance km around (lat, lng).
+
+    One degree of latitude is ~111 km; longitude degrees shrink by
+    cos(lat), clamped so extreme latitudes widen the box rather than
+    collapse it. Letting SQLite cut candidates to the box (via the
+    (status, location_lat, location_lng) index) means only rows near the
+    circle reach the exact haversine check in Python.
+    """
+    dlat = max_distance / 111.0
+    dlng = max_distance / (111.0 * max(cos(radians(lat)), 0.01))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
 
 @gigs_bp.route('/gigs', methods=['POST'])
 @auth_required
@@ -18,9 +49,8 @@ def create_gig():
     data = request.json
     provider_id = session['user_id']
     
-    required = ['title', 'category', 'date_time', 'pay', 'location_lat', 'location_lng']
-    if not all(k in data for k in required):
-        return jsonify({'error': 'Missing required fields'}), 400
+    if missing_fields(data, _GIG_REQUIRED):
+        return json_response({'error': 'Missing required fields'}, 400)
     
     # Validate numeric fields
     try:
@@ -28,29 +58,25 @@ def create_gig():
         lat = float(data['location_lat'])
         lng = float(data['location_lng'])
     except (ValueError, TypeError):
-        return jsonify({'error': 'Invalid numeric values'}), 400
+        return json_response({'error': 'Invalid numeric values'}, 400)
     
     if not validate_coordinates(lat, lng):
-        return jsonify({'error': 'Invalid coordinates'}), 400
+        return json_response({'error': 'Invalid coordinates'}, 400)
     
     db = get_db()
     try:
-        c = db.cursor()
-        c.execute('''INSERT INTO gigs (provider_id, title, category, skills_required,
-                     description, date_time, duration, pay, location_lat, location_lng,
-                     location_address) 
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                  (provider_id, data['title'], data['category'], 
-                   data.get('skills_required'), data.get('description'),
-                   data['date_time'], data.get('duration'), pay,
-                   lat, lng, data.get('location_address')))
-        gig_id = c.lastrowid
+        cur = db.execute(SQL_CREATE_GIG,
+                         (provider_id, data['title'], data['category'],
+                          data.get('skills_required'), data.get('description'),
+                          data['date_time'], data.get('duration'), pay,
+                          lat, lng, data.get('location_address')))
+        gig_id = cur.lastrowid
         db.commit()
         
-        return jsonify({'message': 'Gig created successfully', 'gig_id': gig_id}), 201
-    except Exception as e:
-        print(f"Error creating gig: {str(e)}")
-        return jsonify({'error': 'Failed to create gig'}), 500
+        return json_response({'message': 'Gig created successfully', 'gig_id': gig_id}, 201)
+    except Exception:
+        logger.exception("Error creating gig")
+        return json_response({'error': 'Failed to create gig'}, 500)
 
 @gigs_bp.route('/gigs', methods=['GET'])
 def get_gigs():
@@ -68,7 +94,7 @@ def get_gigs():
                    FROM gigs g JOIN users u ON g.provider_id = u.id 
                    WHERE g.provider_id = ? ORDER BY g.created_at DESC'''
         gigs = db.execute(query, (user_id,)).fetchall()
-        result = [dict(gig) for gig in gigs]
+        result = rows_to_dicts(gigs)
     else:
         # Get all gigs with filters
         query = '''SELECT g.*, u.name as provider_name, u.rating as provider_rating
@@ -79,27 +105,42 @@ def get_gigs():
         if category:
             query += ' AND g.category = ?'
             params.append(category)
-        
+
+        # Prefilter to a bounding box in SQL so distant gigs never cross
+        # the SQLite boundary; the haversine below stays as the exact
+        # circle check for box corners. Explicit None checks: 0.0 is a
+        # valid coordinate (equator/prime meridian), not a missing one.
+        has_location = lat is not None and lng is not None
+        if has_location:
+            lat_min, lat_max, lng_min, lng_max = _bounding_box(lat, lng, max_distance)
+            query += (' AND g.location_lat BETWEEN ? AND ?'
+                      ' AND g.location_lng BETWEEN ? AND ?')
+            params.extend((lat_min, lat_max, lng_min, lng_max))
+
         gigs = db.execute(query, params).fetchall()
-        
-        result = []
-        for gig in gigs:
-            gig_dict = dict(gig)
-            
-            # Calculate distance if user location provided
-            if lat and lng:
-                distance = haversine_distance(lat, lng, gig['location_lat'], gig['location_lng'])
-                if distance <= max_distance:
-                    gig_dict['distance'] = round(distance, 2)
-                    result.append(gig_dict)
-            else:
+
+        if has_location:
+            # Batched distance pass, then an index mask: dicts are built
+            # only for rows inside the circle, and the distance values
+            # are materialized as plain floats at the same time
+            dists = haversine_vector(lat, lng,
+                                     [g['location_lat'] for g in gigs],
+                                     [g['location_lng'] for g in gigs],
+                                     cutoff=max_distance)
+            keep = [i for i, d in enumerate(dists) if d <= max_distance]
+            result = []
+            for i in keep:
+                gig_dict = dict(gigs[i])
+                gig_dict['distance'] = round(float(dists[i]), 2)
                 result.append(gig_dict)
-        
-        # Sort by distance if location provided
-        if lat and lng:
-            result.sort(key=lambda x: x.get('distance', float('inf')))
+
+            # Sort by distance; every kept row has the key, so itemgetter
+            # dispatches straight to the C-level dict lookup
+            result.sort(key=itemgetter('distance'))
+        else:
+            result = rows_to_dicts(gigs)
     
-    return jsonify({'gigs': result}), 200
+    return json_response({'gigs': result})
 
 @gigs_bp.route('/gigs/<int:gig_id>', methods=['GET'])
 def get_gig(gig_id):
@@ -110,44 +151,61 @@ def get_gig(gig_id):
                           WHERE g.id = ?''', (gig_id,)).fetchone()
     
     if not gig:
-        return jsonify({'error': 'Gig not found'}), 404
+        return json_response({'error': 'Gig not found'}, 404)
     
-    return jsonify({'gig': dict(gig)}), 200
+    return json_response({'gig': dict(gig)})
 
 @gigs_bp.route('/gigs/recommended', methods=['GET'])
 @auth_required
 def get_recommended_gigs():
-    user_id = session['user_id']
     lat = request.args.get('lat', type=float)
     lng = request.args.get('lng', type=float)
     
-    if not lat or not lng:
-        return jsonify({'error': 'Location required for recommendations'}), 400
+    if lat is None or lng is None:
+        return json_response({'error': 'Location required for recommendations'}, 400)
     
     db = get_db()
     
-    # Get user profile
-    user = db.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+    # Get user profile (memoized on flask.g for the request); parse the
+    # seeker's skills once here rather than per scored gig
+    user = current_user()
+    seeker_skills = parse_skills(user['skills']) if user['skills'] else frozenset()
+    seeker_rating = user['rating']
     
-    # Get all open gigs
-    gigs = db.execute('''SELECT g.*, u.name as provider_name, u.rating as provider_rating
+    # Stream open gigs inside the 35km bounding box straight off the
+    # cursor (exact circle check below) into a bounded min-heap: no
+    # fetchall materialization, and at most 20 scored dicts are ever
+    # held regardless of candidate count
+    lat_min, lat_max, lng_min, lng_max = _bounding_box(lat, lng, 35)
+    cursor = db.execute('''SELECT g.*, u.name as provider_name, u.rating as provider_rating
                            FROM gigs g JOIN users u ON g.provider_id = u.id
-                           WHERE g.status = 'open' ''').fetchall()
-    
-    recommendations = []
-    for gig in gigs:
-        distance = haversine_distance(lat, lng, gig['location_lat'], gig['location_lng'])
-        
-        if distance <= 35:  # Within 35km radius
-            gig_dict = dict(gig)
-            gig_dict['distance'] = round(distance, 2)
-            gig_dict['match_score'] = calculate_match_score(user, gig, distance)
-            recommendations.append(gig_dict)
-    
-    # Sort by match score (descending)
-    recommendations.sort(key=lambda x: x['match_score'], reverse=True)
-    
-    return jsonify({'recommendations': recommendations[:20]}), 200
+                           WHERE g.status = 'open'
+                           AND g.location_lat BETWEEN ? AND ?
+                           AND g.location_lng BETWEEN ? AND ?''',
+                        (lat_min, lat_max, lng_min, lng_max))
+
+    dist_from = make_haversine_from(lat, lng)
+    heap = []
+    tie = count()  # breaks score ties so dicts are never compared
+    for gig in cursor:
+        distance = dist_from(gig['location_lat'], gig['location_lng'])
+        if distance > 35:  # Outside the 35km radius
+            continue
+        score = calculate_match_score(seeker_skills, seeker_rating, gig, distance)
+        if len(heap) == 20 and score <= heap[0][0]:
+            continue  # cannot make the top 20; skip the dict build
+        gig_dict = dict(gig)
+        gig_dict['distance'] = round(distance, 2)
+        gig_dict['match_score'] = score
+        entry = (score, next(tie), gig_dict)
+        if len(heap) < 20:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heapreplace(heap, entry)
+
+    # Highest score first, earliest-seen first on ties (matches nlargest)
+    heap.sort(key=lambda e: (-e[0], e[1]))
+    return json_response({'recommendations': [e[2] for e in heap]})
 
 @gigs_bp.route('/user/gigs', methods=['GET'])
 @auth_required
@@ -156,7 +214,7 @@ def get_user_gigs():
     db = get_db()
     gigs = db.execute('''SELECT * FROM gigs WHERE provider_id = ? ORDER BY created_at DESC''', 
                        (user_id,)).fetchall()
-    return jsonify({'gigs': [dict(gig) for gig in gigs]}), 200
+    return json_response({'gigs': rows_to_dicts(gigs)})
 
 # Application endpoints
 @gigs_bp.route('/gigs/<int:gig_id>/apply', methods=['POST'])
@@ -171,20 +229,20 @@ def apply_to_gig(gig_id):
         # Check if gig exists and is open
         gig = db.execute('SELECT * FROM gigs WHERE id = ?', (gig_id,)).fetchone()
         if not gig:
-            return jsonify({'error': 'Gig not found'}), 404
+            return json_response({'error': 'Gig not found'}, 404)
         
         if gig['status'] != 'open':
-            return jsonify({'error': 'Gig is no longer available'}), 400
+            return json_response({'error': 'Gig is no longer available'}, 400)
         
         # Check if user is trying to apply to their own gig
         if gig['provider_id'] == seeker_id:
-            return jsonify({'error': 'Cannot apply to your own gig'}), 400
+            return json_response({'error': 'Cannot apply to your own gig'}, 400)
         
         # Check if already applied
         existing = db.execute('SELECT id FROM applications WHERE gig_id = ? AND seeker_id = ?',
                            (gig_id, seeker_id)).fetchone()
         if existing:
-            return jsonify({'error': 'Already applied to this gig'}), 400
+            return json_response({'error': 'Already applied to this gig'}, 400)
         
         # Create application
         c = db.cursor()
@@ -195,15 +253,15 @@ def apply_to_gig(gig_id):
         
         db.commit()
         
-        return jsonify({
+        return json_response({
             'message': 'Application submitted successfully', 
             'application_id': app_id
-        }), 201
+        }, 201)
         
-    except Exception as e:
-        print(f"Error applying to gig: {str(e)}")  # Debug print
+    except Exception:
+        logger.exception("Error applying to gig")
         db.rollback()
-        return jsonify({'error': 'Failed to submit application'}), 500
+        return json_response({'error': 'Failed to submit application'}, 500)
 
 @gigs_bp.route('/user/applications', methods=['GET'])
 @auth_required
@@ -216,7 +274,7 @@ def get_user_applications():
                                    JOIN users u ON g.provider_id = u.id
                                    WHERE a.seeker_id = ? ORDER BY a.created_at DESC''', 
                                (user_id,)).fetchall()
-    return jsonify({'applications': [dict(app) for app in applications]}), 200
+    return json_response({'applications': rows_to_dicts(applications)})
 
 @gigs_bp.route('/gigs/<int:gig_id>/applications', methods=['GET'])
 @auth_required
@@ -226,7 +284,7 @@ def get_gig_applications(gig_id):
     # Verify user owns the gig
     gig = db.execute('SELECT provider_id FROM gigs WHERE id = ?', (gig_id,)).fetchone()
     if not gig or gig['provider_id'] != session['user_id']:
-        return jsonify({'error': 'Unauthorized'}), 403
+        return json_response({'error': 'Unauthorized'}, 403)
     
     applications = db.execute('''SELECT a.*, u.name as seeker_name, u.email as seeker_email, 
                                 u.phone as seeker_phone, u.skills as seeker_skills,
@@ -236,7 +294,7 @@ def get_gig_applications(gig_id):
                                 WHERE a.gig_id = ? ORDER BY a.created_at DESC''', 
                             (gig_id,)).fetchall()
     
-    return jsonify({'applications': [dict(app) for app in applications]}), 200
+    return json_response({'applications': rows_to_dicts(applications)})
 
 @gigs_bp.route('/applications/<int:app_id>/status', methods=['PUT'])
 @auth_required
@@ -245,7 +303,7 @@ def update_application_status(app_id):
     status = data.get('status')
     
     if status not in ['accepted', 'rejected']:
-        return jsonify({'error': 'Invalid status. Must be "accepted" or "rejected"'}), 400
+        return json_response({'error': 'Invalid status. Must be "accepted" or "rejected"'}, 400)
     
     db = get_db()
     
@@ -256,39 +314,39 @@ def update_application_status(app_id):
                           WHERE a.id = ?''', (app_id,)).fetchone()
         
         if not app:
-            return jsonify({'error': 'Application not found'}), 404
+            return json_response({'error': 'Application not found'}, 404)
             
         if app['provider_id'] != session['user_id']:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        # Update application status
-        db.execute('UPDATE applications SET status = ? WHERE id = ?', (status, app_id))
+            return json_response({'error': 'Unauthorized'}, 403)
         
-        # If accepted, update gig status and assign seeker
-        if status == 'accepted':
-            db.execute('UPDATE gigs SET status = ?, seeker_id = ? WHERE id = ?',
-                      ('assigned', app['seeker_id'], app['gig_id']))
-            
-            # Reject all other applications for this gig
-            db.execute('UPDATE applications SET status = ? WHERE gig_id = ? AND id != ?',
-                      ('rejected', app['gig_id'], app_id))
-            
-            # Create a contract automatically
-            db.execute('''INSERT INTO contracts (gig_id, provider_id, seeker_id, terms, pay, date)
-                          VALUES (?, ?, ?, ?, ?, ?)''',
-                      (app['gig_id'], app['provider_id'], app['seeker_id'],
-                       f"Contract for gig: {app['title']}",  # Basic terms
-                       0,  # Pay will be set later
-                       datetime.now().strftime('%Y-%m-%d')))
-        
-        db.commit()
-        
-        return jsonify({'message': f'Application {status} successfully'}), 200
-        
-    except Exception as e:
-        print(f"Error updating application status: {str(e)}")
-        db.rollback()
-        return jsonify({'error': 'Failed to update application status'}), 500
+        # All the writes share one transaction and one commit fsync; the
+        # context manager rolls back if any statement fails
+        with db:
+            # Update application status
+            db.execute('UPDATE applications SET status = ? WHERE id = ?', (status, app_id))
+
+            # If accepted, update gig status and assign seeker
+            if status == 'accepted':
+                db.execute('UPDATE gigs SET status = ?, seeker_id = ? WHERE id = ?',
+                          ('assigned', app['seeker_id'], app['gig_id']))
+
+                # Reject all other applications for this gig
+                db.execute('UPDATE applications SET status = ? WHERE gig_id = ? AND id != ?',
+                          ('rejected', app['gig_id'], app_id))
+
+                # Create a contract automatically
+                db.execute('''INSERT INTO contracts (gig_id, provider_id, seeker_id, terms, pay, date)
+                              VALUES (?, ?, ?, ?, ?, ?)''',
+                          (app['gig_id'], app['provider_id'], app['seeker_id'],
+                           f"Contract for gig: {app['title']}",  # Basic terms
+                           0,  # Pay will be set later
+                           datetime.now().strftime('%Y-%m-%d')))
+
+        return json_response({'message': f'Application {status} successfully'})
+
+    except Exception:
+        logger.exception("Error updating application status")
+        return json_response({'error': 'Failed to update application status'}, 500)
 
 # Debug endpoint
 @gigs_bp.route('/debug/gigs', methods=['GET'])
@@ -300,8 +358,8 @@ def debug_gigs():
     applications = db.execute('SELECT * FROM applications').fetchall()
     users = db.execute('SELECT id, name, email FROM users').fetchall()
     
-    return jsonify({
-        'gigs': [dict(gig) for gig in gigs],
-        'applications': [dict(app) for app in applications],
-        'users': [dict(user) for user in users]
-    }), 200
\ No newline at end of file
+    return json_response({
+        'gigs': rows_to_dicts(gigs),
+        'applications': rows_to_dicts(applications),
+        'users': rows_to_dicts(users)
+    })
\ No newline at end of file
@@ -0,0 +1,19 @@
+# utils/env.py - One-shot .env loading shared by all entry points
+import os
+
+_loaded = False
+
+def load_env():
+    """Parse .env at most once per process, regardless of import order.
+
+    The GIGUP_ENV_LOADED sentinel also covers pre-fork servers that load
+    the environment before spawning workers.
+    """
+    global _loaded
+    if _loaded or os.environ.get('GIGUP_ENV_LOADED'):
+        _loaded = True
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    os.environ['GIGUP_ENV_LOADED'] = '1'
+    _loaded = True
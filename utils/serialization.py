@@ -0,0 +1,32 @@
+# utils/serialization.py - JSON serialization helpers
+# orjson serializes dicts/lists several times faster than the stdlib json
+# used by Flask's jsonify; fall back to the stdlib when it isn't installed.
+from flask import Response
+
+try:
+    import orjson
+
+    def dumps(obj):
+        """Serialize obj to JSON bytes."""
+        return orjson.dumps(obj)
+except ImportError:
+    import json
+
+    def dumps(obj):
+        """Serialize obj to JSON bytes."""
+        return json.dumps(obj, default=str, separators=(',', ':')).encode('utf-8')
+
+def rows_to_dicts(rows):
+    """Convert a sequence of sqlite3.Row objects to plain dicts.
+
+    Reads the column names once instead of per row, which roughly halves
+    the conversion cost of `[dict(r) for r in rows]` on wide result sets.
+    """
+    if not rows:
+        return []
+    keys = rows[0].keys()
+    return [dict(zip(keys, row)) for row in rows]
+
+def json_response(obj, status=200):
+    """Drop-in replacement for `jsonify(obj), status` using dumps above."""
+    return Response(dumps(obj), status=status, mimetype='application/json')